@@ -10,15 +10,225 @@ import logging
 import signal
 import time
 import traceback
+import base64
+import hashlib
+import struct
+import sys
+import json
+import math
+import os
+import socket
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from socketserver import ThreadingMixIn
 
 import select
 
+# WebSocket (RFC 6455) constants
+WS_MAGIC_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_OP_CONTINUATION = 0x0
+WS_OP_TEXT = 0x1
+WS_OP_BINARY = 0x2
+WS_OP_CLOSE = 0x8
+WS_OP_PING = 0x9
+WS_OP_PONG = 0xA
+WS_CLOSE_PROTOCOL_ERROR = 1002
+WS_CLOSE_TOO_BIG = 1009
+WS_MAX_CONTROL_PAYLOAD = 125  # RFC 6455 5.5
+WS_MAX_ACK_PAYLOAD = 1024
+
+# Binary frame header sent before each JPEG: sequence (uint32), capture time (float64, unix seconds)
+WS_FRAME_HEADER = struct.Struct('!Id')
+
+
+class FrameBroadcaster:
+    """Holds the newest frame of a camera and wakes up clients waiting for it"""
+    
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0
+        self.timestamp = 0.0
+    
+    def publish(self, frame):
+        """Replace the current frame and notify all waiting clients"""
+        with self.condition:
+            self.frame = frame
+            self.sequence += 1
+            self.timestamp = time.time()
+            self.condition.notify_all()
+    
+    def wait_for_frame(self, last_sequence, timeout=1.0):
+        """Wait for a frame newer than last_sequence
+        
+        Returns (sequence, timestamp, frame) of the newest frame, or None on timeout.
+        Frames published in the meantime are skipped so slow clients never fall behind.
+        """
+        with self.condition:
+            if self.sequence == last_sequence:
+                self.condition.wait(timeout)
+            if self.sequence == last_sequence or self.frame is None:
+                return None
+            return self.sequence, self.timestamp, self.frame
+
+
+# Upper bound for /debug/profile?seconds=N so a request can't pin the sampler forever
+MAX_PROFILE_SECONDS = 60
+PROFILE_INTERVAL = 0.005  # Stack sampling interval in seconds
+
+_profile_lock = threading.Lock()
+
+
+class StageProfiler:
+    """Sampled per-stage timer for the frame hot path
+    
+    Each stage has its own counter and only every Nth call to sample(stage)
+    returns True, so every stage is sampled at the same rate however often
+    it runs per frame. When disabled, sample() is a single attribute check.
+    """
+    
+    STAGES = ('capture', 'parse', 'dispatch', 'send')
+    
+    def __init__(self, enabled=False, sample_every=10):
+        self.enabled = enabled
+        self.sample_every = max(1, int(sample_every))
+        self._counters = dict.fromkeys(self.STAGES, 0)
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear all collected timings"""
+        with self._lock:
+            self.stats = {stage: {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+                          for stage in self.STAGES}
+    
+    def sample(self, stage):
+        """Return True if the current iteration of stage should be timed"""
+        if not self.enabled:
+            return False
+        self._counters[stage] += 1  # Racy across threads, but only used for sampling
+        return self._counters[stage] % self.sample_every == 0
+    
+    def record(self, stage, seconds):
+        """Record the duration of a sampled stage"""
+        with self._lock:
+            stat = self.stats[stage]
+            stat['count'] += 1
+            stat['total'] += seconds
+            stat['last'] = seconds
+            if seconds > stat['max']:
+                stat['max'] = seconds
+    
+    def snapshot(self):
+        """Return per-stage timings in milliseconds"""
+        with self._lock:
+            return {
+                stage: {
+                    'samples': stat['count'],
+                    'avg_ms': round(stat['total'] / stat['count'] * 1000, 3) if stat['count'] else 0.0,
+                    'max_ms': round(stat['max'] * 1000, 3),
+                    'last_ms': round(stat['last'] * 1000, 3),
+                }
+                for stage, stat in self.stats.items()
+            }
+
+
+def sample_stacks(seconds, interval=PROFILE_INTERVAL, top=30):
+    """Sample the stacks of all live threads for the given duration
+    
+    Unlike cProfile this sees every thread (capture loops, HTTP handlers)
+    without instrumenting them, so it is safe to run against production.
+    Returns a plain-text report of the hottest functions.
+    """
+    own_ident = threading.get_ident()
+    own_counts = Counter()
+    cumulative_counts = Counter()
+    thread_counts = Counter()
+    samples = 0
+    
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            thread_counts[names.get(ident, str(ident))] += 1
+            seen = set()
+            leaf = True
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                if leaf:
+                    own_counts[key] += 1
+                    leaf = False
+                if key not in seen:
+                    cumulative_counts[key] += 1
+                    seen.add(key)
+                frame = frame.f_back
+        samples += 1
+        time.sleep(interval)
+    
+    lines = [f"Stack samples: {samples} over {seconds}s (interval {interval * 1000:.1f} ms)", ""]
+    lines.append("Samples per thread:")
+    for name, count in thread_counts.most_common():
+        lines.append(f"  {count:8d}  {name}")
+    for title, counts in (("Top functions (self):", own_counts),
+                          ("Top functions (cumulative):", cumulative_counts)):
+        lines.append("")
+        lines.append(title)
+        for key, count in counts.most_common(top):
+            lines.append(f"  {count:8d}  {count * 100.0 / max(samples, 1):6.1f}%  {key}")
+    return "\n".join(lines) + "\n"
+
+
+def read_mjpeg_part(stream):
+    """Read the next JPEG from a multipart MJPEG byte stream, None on EOF or a bad part"""
+    if not read_mjpeg_boundary(stream):
+        return None
+    return read_mjpeg_body(stream)
+
+
+def read_mjpeg_boundary(stream):
+    """Skip to the next multipart boundary line, False on EOF"""
+    while True:
+        line = stream.readline()
+        if not line:
+            return False
+        if line.startswith(b'--'):
+            return True
+
+
+def read_mjpeg_body(stream):
+    """Read the headers and JPEG data following a boundary, None on EOF or a bad part"""
+    # Read headers until blank line
+    content_length = None
+    while True:
+        line = stream.readline()
+        if not line:
+            return None
+        if line in (b'\r\n', b'\n'):
+            break
+        if line.lower().startswith(b'content-length:'):
+            try:
+                content_length = int(line.split(b':', 1)[1].strip())
+            except (ValueError, IndexError):
+                pass
+    
+    # Read binary JPEG data
+    if content_length and content_length > 0:
+        jpeg_data = stream.read(content_length)
+        if len(jpeg_data) == content_length:
+            return jpeg_data
+    
+    return None
+
+
 class CameraStream:
     """Manages a single camera stream using ffmpeg"""
     
-    def __init__(self, config):
+    def __init__(self, config, profiling=None):
         self.name = config['name']
         self.device = config['device']
         self.port = config['port']
@@ -30,6 +240,13 @@ class CameraStream:
         
         self.process = None
         self.running = False
+        self.capture_thread = None
+        self.broadcaster = FrameBroadcaster()
+        profiling = profiling or {}
+        self.profiler = StageProfiler(
+            enabled=profiling.get('enabled', False),
+            sample_every=profiling.get('sample_every', 10)
+        )
         self.logger = logging.getLogger(f"Camera-{self.name}")
         self.error_count = 0
         self.consecutive_empty_reads = 0
@@ -102,13 +319,16 @@ class CameraStream:
             self.running = True
             self.last_frame_time = time.time()
             
+            # Single reader thread feeds all clients through the broadcaster
+            self.capture_thread = threading.Thread(
+                target=self._capture_loop,
+                daemon=True,
+                name=f"Capture-{self.name}"
+            )
+            self.capture_thread.start()
+            
             # Test frame reading
-            test_frame = None
-            for attempt in range(20):
-                test_frame = self.read_frame()
-                if test_frame:
-                    break
-                time.sleep(0.1)
+            test_frame = self.broadcaster.wait_for_frame(0, timeout=2.0)
             
             if not test_frame:
                 self.logger.warning("ffmpeg started but no frames yet - may be slow camera or low bandwidth")
@@ -140,13 +360,34 @@ class CameraStream:
                 self.process.kill()
                 self.process.wait()
         
+        if self.capture_thread:
+            self.capture_thread.join(timeout=5)
+            self.capture_thread = None
+        
         self.logger.info("Camera stopped")
     
+    def _capture_loop(self):
+        """Read frames from ffmpeg and publish them to the broadcaster"""
+        while self.running:
+            frame = self.read_frame()
+            if frame:
+                if self.profiler.sample('dispatch'):
+                    start = time.perf_counter()
+                    self.broadcaster.publish(frame)
+                    self.profiler.record('dispatch', time.perf_counter() - start)
+                else:
+                    self.broadcaster.publish(frame)
+            else:
+                time.sleep(0.01)  # Prevent busy loop
+    
     def read_frame(self):
         """Read a single MJPEG frame with timeout to prevent freezing"""
         if not self.running or not self.process:
             return None
         
+        # Capture and parse of the same frame are timed together
+        start = time.perf_counter() if self.profiler.sample('capture') else None
+        
         try:
             # Check if data is available with 1.0 second timeout
             ready, _, _ = select.select([self.process.stdout], [], [], 1.0)
@@ -157,37 +398,17 @@ class CameraStream:
                 return None
             
             self.consecutive_empty_reads = 0
+            if start is not None:
+                captured = time.perf_counter()
+                self.profiler.record('capture', captured - start)
+                start = captured
             
-            # Read multipart boundary
-            while True:
-                line = self.process.stdout.readline()
-                if not line:
-                    return None
-                if line.startswith(b'--'):
-                    break
-            
-            # Read headers until blank line
-            content_length = None
-            while True:
-                line = self.process.stdout.readline()
-                if not line:
-                    return None
-                if line in (b'\r\n', b'\n'):
-                    break
-                if line.lower().startswith(b'content-length:'):
-                    try:
-                        content_length = int(line.split(b':', 1)[1].strip())
-                    except (ValueError, IndexError):
-                        pass
-            
-            # Read binary JPEG data
-            if content_length and content_length > 0:
-                jpeg_data = self.process.stdout.read(content_length)
-                if len(jpeg_data) == content_length:
-                    self.last_frame_time = time.time()
-                    return jpeg_data
-            
-            return None
+            jpeg_data = read_mjpeg_part(self.process.stdout)
+            if jpeg_data:
+                self.last_frame_time = time.time()
+                if start is not None:
+                    self.profiler.record('parse', time.perf_counter() - start)
+            return jpeg_data
             
         except Exception as e:
             self.error_count += 1
@@ -196,6 +417,185 @@ class CameraStream:
             return None
 
 
+class RelayStream(CameraStream):
+    """Re-publishes the /stream of another streamer instance instead of a local camera
+    
+    Keeps a single upstream connection per camera and reconnects with
+    exponential backoff, so the upstream Pi serves exactly one client
+    while this instance handles the fan-out.
+    """
+    
+    READ_TIMEOUT = 10  # Seconds without upstream data before reconnecting
+    MAX_RECONNECT_DELAY = 30
+    
+    def __init__(self, config, profiling=None):
+        super().__init__(config, profiling)
+        self.url = urlsplit(self.device)
+        if self.url.scheme not in ('http', 'https') or not self.url.hostname:
+            raise ValueError(f"Invalid relay URL: {self.device}")
+        try:
+            self.upstream_port = self.url.port
+        except ValueError:
+            raise ValueError(f"Invalid port in relay URL: {self.device}")
+        
+        # connection/response are only replaced by the capture thread
+        self.connection = None
+        self.response = None
+        self.reconnect_delay = 1
+        self.next_connect_time = 0
+    
+    @staticmethod
+    def is_relay_device(device):
+        """Return True if the device refers to an upstream streamer URL"""
+        return str(device).startswith(('http://', 'https://'))
+    
+    def start(self):
+        """Start ingesting the upstream stream"""
+        if self.running:
+            self.logger.warning("Camera already running")
+            return
+        
+        self.logger.info(f"Starting relay of {self.device}")
+        self.running = True
+        self.last_frame_time = time.time()
+        self.capture_thread = threading.Thread(
+            target=self._capture_loop,
+            daemon=True,
+            name=f"Relay-{self.name}"
+        )
+        self.capture_thread.start()
+        
+        # Upstream may still be booting, reconnect logic takes over if it is down
+        if not self.broadcaster.wait_for_frame(0, timeout=5.0):
+            self.logger.warning("Relay started but no frames from upstream yet - will keep retrying")
+        else:
+            self.logger.info(f"Relay started successfully on port {self.port}")
+    
+    def stop(self):
+        """Stop the relay and close the upstream connection"""
+        if not self.running:
+            return
+        
+        self.logger.info("Stopping relay")
+        self.running = False
+        self._interrupt()
+        
+        if self.capture_thread:
+            self.capture_thread.join(timeout=5)
+            if not self.capture_thread.is_alive():
+                self._disconnect()
+            self.capture_thread = None
+        
+        self.logger.info("Relay stopped")
+    
+    def _connect(self):
+        """Open the upstream connection and start the multipart response"""
+        connection_class = HTTPSConnection if self.url.scheme == 'https' else HTTPConnection
+        connection = connection_class(self.url.hostname, self.upstream_port, timeout=self.READ_TIMEOUT)
+        path = self.url.path or '/stream'
+        if self.url.query:
+            path += '?' + self.url.query
+        
+        connection.connect()
+        # Detect silently dropped peers (e.g. upstream lost power) at the TCP level
+        connection.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self.connection = connection
+        if not self.running:
+            # stop() ran while connect() blocked and had nothing to interrupt
+            self._disconnect()
+            return
+        
+        connection.request('GET', path, headers={'Connection': 'keep-alive'})
+        response = connection.getresponse()
+        if response.status != 200:
+            raise HTTPException(f"upstream returned {response.status} {response.reason}")
+        content_type = response.getheader('Content-Type', '')
+        if not content_type.lower().startswith('multipart/x-mixed-replace'):
+            raise HTTPException(
+                f"upstream returned {content_type or 'no content type'}, "
+                f"expected an MJPEG stream (is the URL pointing at /stream?)"
+            )
+        
+        self.response = response
+        self.logger.info(f"Connected to upstream {self.device}")
+    
+    def _interrupt(self):
+        """Unblock a pending upstream read from another thread
+        
+        Only shuts the socket down, the capture thread then sees EOF and
+        cleans up itself, so connection state is never swapped under it.
+        """
+        connection = self.connection
+        sock = connection.sock if connection else None
+        if sock:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+    
+    def _disconnect(self):
+        """Close the upstream connection (capture thread only)"""
+        connection = self.connection
+        self.connection = None
+        self.response = None
+        if connection:
+            connection.close()
+    
+    def read_frame(self):
+        """Read a single frame from upstream, reconnecting with backoff when needed"""
+        if not self.running:
+            return None
+        
+        response = self.response
+        if response is None:
+            remaining = self.next_connect_time - time.time()
+            if remaining > 0:
+                time.sleep(min(remaining, 0.5))
+                return None
+            try:
+                self._connect()
+            except (OSError, HTTPException) as e:
+                self._disconnect()
+                self.logger.warning(f"Upstream {self.device} unavailable ({e}), retrying in {self.reconnect_delay}s")
+                self.next_connect_time = time.time() + self.reconnect_delay
+                self.reconnect_delay = min(self.reconnect_delay * 2, self.MAX_RECONNECT_DELAY)
+                return None
+            response = self.response
+            if response is None:
+                return None  # Stopped while connecting
+        
+        # Like CameraStream: waiting for the upstream is capture, the rest is parse
+        start = time.perf_counter() if self.profiler.sample('capture') else None
+        
+        try:
+            jpeg_data = None
+            if read_mjpeg_boundary(response):
+                if start is not None:
+                    captured = time.perf_counter()
+                    self.profiler.record('capture', captured - start)
+                    start = captured
+                jpeg_data = read_mjpeg_body(response)
+        except (OSError, HTTPException, ValueError) as e:
+            jpeg_data = None
+            if self.running:
+                self.logger.warning(f"Error reading from upstream: {e}")
+        
+        if not jpeg_data:
+            # EOF, timeout or malformed part - drop the connection and reconnect
+            if self.running:
+                self.logger.warning(f"Lost upstream stream, reconnecting in {self.reconnect_delay}s")
+            self._disconnect()
+            self.next_connect_time = time.time() + self.reconnect_delay
+            self.reconnect_delay = min(self.reconnect_delay * 2, self.MAX_RECONNECT_DELAY)
+            return None
+        
+        self.reconnect_delay = 1
+        self.last_frame_time = time.time()
+        if start is not None:
+            self.profiler.record('parse', time.perf_counter() - start)
+        return jpeg_data
+
+
 class StreamingHandler(BaseHTTPRequestHandler):
     """HTTP request handler for MJPEG streaming"""
     
@@ -203,10 +603,17 @@ class StreamingHandler(BaseHTTPRequestHandler):
     
     def do_GET(self):
         """Handle GET requests"""
-        if self.path == '/stream':
+        url = urlsplit(self.path)
+        if url.path == '/stream':
             self.stream_mjpeg()
-        elif self.path == '/' or self.path == '/index.html':
+        elif url.path == '/ws':
+            self.stream_websocket()
+        elif url.path == '/' or url.path == '/index.html':
             self.send_index()
+        elif url.path == '/debug/stages' and self.camera.profiler.enabled:
+            self.send_stages()
+        elif url.path == '/debug/profile' and self.camera.profiler.enabled:
+            self.send_profile(parse_qs(url.query))
         else:
             self.send_error(404, "File not found")
     
@@ -219,21 +626,211 @@ class StreamingHandler(BaseHTTPRequestHandler):
         self.end_headers()
         
         try:
+            sequence = 0
             while self.camera.running:
-                frame = self.camera.read_frame()
-                if frame:
-                    self.wfile.write(b'--jpgboundary\r\n')
-                    self.wfile.write(b'Content-Type: image/jpeg\r\n')
-                    self.wfile.write(f'Content-Length: {len(frame)}\r\n\r\n'.encode())
-                    self.wfile.write(frame)
-                    self.wfile.write(b'\r\n')
-                else:
-                    time.sleep(0.01)  # Prevent busy loop
+                result = self.camera.broadcaster.wait_for_frame(sequence)
+                if not result:
+                    continue
+                sequence, _, frame = result
+                start = time.perf_counter() if self.camera.profiler.sample('send') else None
+                self.wfile.write(b'--jpgboundary\r\n')
+                self.wfile.write(b'Content-Type: image/jpeg\r\n')
+                self.wfile.write(f'Content-Length: {len(frame)}\r\n\r\n'.encode())
+                self.wfile.write(frame)
+                self.wfile.write(b'\r\n')
+                if start is not None:
+                    self.camera.profiler.record('send', time.perf_counter() - start)
         except BrokenPipeError:
             logging.debug("Client disconnected")
         except Exception as e:
             logging.error(f"Streaming error: {e}")
     
+    def stream_websocket(self):
+        """Push JPEG frames as binary WebSocket messages, one per client ack
+        
+        Each message is WS_FRAME_HEADER followed by the JPEG data. The next
+        frame is only sent after the client acknowledges the previous one, and
+        it is always the newest available, so latency follows the client's
+        real render rate instead of building up in buffers.
+        """
+        key = self.headers.get('Sec-WebSocket-Key')
+        if self.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            self.send_error(400, "Expected WebSocket upgrade")
+            return
+        
+        accept = base64.b64encode(hashlib.sha1(key.strip().encode() + WS_MAGIC_GUID).digest())
+        self.protocol_version = 'HTTP/1.1'  # Browsers reject a HTTP/1.0 upgrade response
+        self.send_response(101, "Switching Protocols")
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept.decode())
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+        # Headers and JPEG are separate writes, don't let Nagle hold back the JPEG
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        
+        try:
+            sequence = 0
+            while self.camera.running:
+                result = self.camera.broadcaster.wait_for_frame(sequence)
+                if not result:
+                    continue
+                sequence, timestamp, frame = result
+                start = time.perf_counter() if self.camera.profiler.sample('send') else None
+                self._ws_send(WS_OP_BINARY, WS_FRAME_HEADER.pack(sequence & 0xFFFFFFFF, timestamp), frame)
+                if start is not None:
+                    self.camera.profiler.record('send', time.perf_counter() - start)
+                
+                # Flow control: wait for the client to render this frame
+                if not self._ws_wait_for_ack():
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            logging.debug("WebSocket client disconnected")
+        except Exception as e:
+            logging.error(f"WebSocket streaming error: {e}")
+    
+    def _ws_wait_for_ack(self):
+        """Block until the client sends a data message; False if the connection should close"""
+        while self.camera.running:
+            if not self._ws_readable(1.0):
+                continue
+            
+            opcode, payload = self._ws_recv()
+            if opcode is None:
+                return False
+            if opcode == WS_OP_CLOSE:
+                self._ws_send(WS_OP_CLOSE, payload[:2])
+                return False
+            if opcode == WS_OP_PING:
+                self._ws_send(WS_OP_PONG, payload)
+            elif opcode in (WS_OP_TEXT, WS_OP_BINARY, WS_OP_CONTINUATION):
+                return True
+        return False
+    
+    def _ws_readable(self, timeout):
+        """Return True if rfile has client data buffered or the socket becomes readable"""
+        # Non-blocking peek only returns what rfile already buffered (or can read right now)
+        self.connection.setblocking(False)
+        try:
+            buffered = self.rfile.peek(1)
+        finally:
+            self.connection.setblocking(True)
+        if buffered:
+            return True
+        ready, _, _ = select.select([self.connection], [], [], timeout)
+        return bool(ready)
+    
+    def _ws_recv(self):
+        """Read one WebSocket frame from the client, returns (opcode, payload)
+        
+        Returns (None, b'') on disconnect, or on a protocol violation after
+        sending the matching close frame.
+        """
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None, b''
+        opcode = header[0] & 0x0F
+        masked = header[1] & 0x80
+        length = header[1] & 0x7F
+        if length == 126:
+            extended = self.rfile.read(2)
+            if len(extended) < 2:
+                return None, b''
+            length = struct.unpack('!H', extended)[0]
+        elif length == 127:
+            extended = self.rfile.read(8)
+            if len(extended) < 8:
+                return None, b''
+            length = struct.unpack('!Q', extended)[0]
+        
+        # RFC 6455 5.1: clients must mask every frame
+        if not masked:
+            self._ws_send(WS_OP_CLOSE, struct.pack('!H', WS_CLOSE_PROTOCOL_ERROR))
+            return None, b''
+        # Clients only send acks and control frames, anything large is abuse
+        limit = WS_MAX_CONTROL_PAYLOAD if opcode & 0x8 else WS_MAX_ACK_PAYLOAD
+        if length > limit:
+            self._ws_send(WS_OP_CLOSE, struct.pack('!H', WS_CLOSE_TOO_BIG))
+            return None, b''
+        
+        mask = self.rfile.read(4)
+        payload = self.rfile.read(length) if length else b''
+        if len(mask) < 4 or len(payload) < length:
+            return None, b''
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+    
+    def _ws_send(self, opcode, *parts):
+        """Send a single unmasked WebSocket frame whose payload is the given parts
+        
+        The last part (the JPEG for frames) is written on its own, like
+        stream_mjpeg does, so it is never copied just to prepend headers.
+        """
+        length = sum(len(part) for part in parts)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        if len(parts) > 1:
+            # Small prefixes (frame header) go out with the WebSocket header
+            header += b''.join(parts[:-1])
+        self.wfile.write(header)
+        if parts:
+            self.wfile.write(parts[-1])
+    
+    def send_stages(self):
+        """Send the sampled per-stage timings as JSON"""
+        body = json.dumps({
+            'camera': self.camera.name,
+            'sample_every': self.camera.profiler.sample_every,
+            'stages': self.camera.profiler.snapshot(),
+        }, indent=2).encode()
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_profile(self, query):
+        """Run a bounded stack-sampling profile of the live process and send the report"""
+        try:
+            seconds = float(query.get('seconds', ['5'])[0])
+        except ValueError:
+            seconds = math.nan
+        if math.isnan(seconds):
+            self.send_error(400, "Invalid 'seconds' parameter")
+            return
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        
+        # One profile at a time - overlapping samplers would skew each other
+        if not _profile_lock.acquire(blocking=False):
+            self.send_error(409, "A profile is already running")
+            return
+        try:
+            logging.info(f"Profiling for {seconds}s (requested by {self.address_string()})")
+            report = sample_stacks(seconds)
+        finally:
+            _profile_lock.release()
+        
+        stages = self.camera.profiler.snapshot()
+        lines = [f"Stage timings for {self.camera.name} (1 in {self.camera.profiler.sample_every} sampled):"]
+        for stage, stat in stages.items():
+            lines.append(
+                f"  {stage:10s} samples={stat['samples']:<8d} avg={stat['avg_ms']:.3f}ms "
+                f"max={stat['max_ms']:.3f}ms last={stat['last_ms']:.3f}ms"
+            )
+        body = ("\n".join(lines) + "\n\n" + report).encode()
+        
+        self.send_response(200)
+        self.send_header('Content-type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def send_index(self):
         """Send a simple HTML page to view the stream"""
         html = f"""
@@ -250,7 +847,7 @@ class StreamingHandler(BaseHTTPRequestHandler):
                     padding: 20px;
                 }}
                 h1 {{ color: #4CAF50; }}
-                img {{ 
+                canvas, img {{ 
                     max-width: 90vw; 
                     max-height: 80vh; 
                     border: 2px solid #4CAF50;
@@ -272,8 +869,76 @@ class StreamingHandler(BaseHTTPRequestHandler):
                 <p><strong>Resolution:</strong> {self.camera.width}x{self.camera.height}</p>
                 <p><strong>FPS:</strong> {self.camera.fps}</p>
                 <p><strong>Rotation:</strong> {self.camera.rotation}°</p>
+                <p><strong>Frame:</strong> <span id="frame-info">connecting...</span></p>
             </div>
-            <img src="/stream" alt="Camera Stream">
+            <canvas id="stream" width="{self.camera.width}" height="{self.camera.height}"></canvas>
+            <script>
+                // Render frames pushed over /ws, ack each one after drawing.
+                // Falls back to the MJPEG stream if WebSockets are unavailable.
+                const canvas = document.getElementById('stream');
+                const ctx = canvas.getContext('2d');
+                const info = document.getElementById('frame-info');
+                
+                function fallbackToMjpeg() {{
+                    const img = document.createElement('img');
+                    img.src = '/stream';
+                    img.alt = 'Camera Stream';
+                    canvas.replaceWith(img);
+                    info.textContent = 'MJPEG fallback';
+                }}
+                
+                // Consecutive connects that closed before opening; reset on success
+                let failedConnects = 0;
+                let everConnected = false;
+                
+                function connect() {{
+                    const proto = location.protocol === 'https:' ? 'wss:' : 'ws:';
+                    const ws = new WebSocket(proto + '//' + location.host + '/ws');
+                    let opened = false;
+                    ws.binaryType = 'arraybuffer';
+                    ws.onopen = () => {{
+                        opened = true;
+                        everConnected = true;
+                        failedConnects = 0;
+                    }};
+                    ws.onmessage = async (event) => {{
+                        const view = new DataView(event.data);
+                        const sequence = view.getUint32(0);
+                        const timestamp = view.getFloat64(4);
+                        const blob = new Blob([event.data.slice(12)], {{ type: 'image/jpeg' }});
+                        try {{
+                            const bitmap = await createImageBitmap(blob);
+                            if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {{
+                                canvas.width = bitmap.width;
+                                canvas.height = bitmap.height;
+                            }}
+                            ctx.drawImage(bitmap, 0, 0);
+                            bitmap.close();
+                            const age = Date.now() - timestamp * 1000;
+                            info.textContent = '#' + sequence + ' - ' +
+                                new Date(timestamp * 1000).toLocaleTimeString() +
+                                ' (' + Math.max(0, Math.round(age)) + ' ms old)';
+                        }} finally {{
+                            requestAnimationFrame(() => ws.send('ack'));
+                        }}
+                    }};
+                    ws.onclose = () => {{
+                        // Never opened (e.g. proxy dropped Upgrade) or keeps failing: use MJPEG
+                        if (!opened && (!everConnected || ++failedConnects >= 3)) {{
+                            fallbackToMjpeg();
+                            return;
+                        }}
+                        info.textContent = 'disconnected, retrying...';
+                        setTimeout(connect, 2000);
+                    }};
+                }}
+                
+                if ('WebSocket' in window && 'createImageBitmap' in window) {{
+                    connect();
+                }} else {{
+                    fallbackToMjpeg();
+                }}
+            </script>
         </body>
         </html>
         """
@@ -288,6 +953,73 @@ class StreamingHandler(BaseHTTPRequestHandler):
         logging.debug(f"{self.address_string()} - {format % args}")
 
 
+# First file descriptor passed by systemd socket activation (SD_LISTEN_FDS_START)
+SD_LISTEN_FDS_START = 3
+
+
+def sd_notify(state):
+    """Send a state string (e.g. 'READY=1') to systemd over $NOTIFY_SOCKET
+    
+    Returns False when not running under a notify-aware supervisor or the
+    message could not be delivered.
+    """
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    if address.startswith('@'):
+        address = '\0' + address[1:]  # Abstract namespace socket
+    
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.connect(address)
+            sock.sendall(state.encode())
+        return True
+    except OSError as e:
+        logging.debug(f"sd_notify({state!r}) failed: {e}")
+        return False
+
+
+def sd_watchdog_interval():
+    """Return the systemd watchdog timeout in seconds, or None if not enabled"""
+    usec = os.environ.get('WATCHDOG_USEC')
+    if not usec:
+        return None
+    pid = os.environ.get('WATCHDOG_PID')
+    if pid and pid != str(os.getpid()):
+        return None
+    try:
+        return int(usec) / 1_000_000
+    except ValueError:
+        return None
+
+
+def sd_listen_sockets():
+    """Return {port: socket} for listening sockets inherited via systemd socket activation
+    
+    The LISTEN_* variables are removed from the environment so child
+    processes (ffmpeg) don't try to claim the sockets.
+    """
+    if os.environ.get('LISTEN_PID') != str(os.getpid()):
+        return {}
+    try:
+        count = int(os.environ.get('LISTEN_FDS', '0'))
+    except ValueError:
+        count = 0
+    for var in ('LISTEN_PID', 'LISTEN_FDS', 'LISTEN_FDNAMES'):
+        os.environ.pop(var, None)
+    
+    sockets = {}
+    for fd in range(SD_LISTEN_FDS_START, SD_LISTEN_FDS_START + count):
+        os.set_inheritable(fd, False)
+        sock = socket.socket(fileno=fd)
+        if sock.family not in (socket.AF_INET, socket.AF_INET6) or sock.type != socket.SOCK_STREAM:
+            logging.warning(f"Ignoring inherited socket fd {fd}: not a TCP socket")
+            sock.detach()
+            continue
+        sockets[sock.getsockname()[1]] = sock
+    return sockets
+
+
 class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
     """Threaded HTTP server for handling multiple simultaneous connections"""
     allow_reuse_address = True
@@ -303,8 +1035,9 @@ class ThreadedHTTPServer(ThreadingMixIn, HTTPServer):
 class CameraServer:
     """HTTP server for streaming a single camera"""
     
-    def __init__(self, camera):
+    def __init__(self, camera, listen_socket=None):
         self.camera = camera
+        self.listen_socket = listen_socket  # Pre-bound socket from systemd, if any
         self.server = None
         self.thread = None
         self.logger = logging.getLogger(f"Server-{camera.name}")
@@ -315,11 +1048,21 @@ class CameraServer:
             # Create handler class with camera reference
             handler = type('Handler', (StreamingHandler,), {'camera': self.camera})
             
-            self.server = ThreadedHTTPServer(('0.0.0.0', self.camera.port), handler)
-            
-            # Verify server socket is actually bound
-            sock_name = self.server.socket.getsockname()
-            self.logger.info(f"Server socket bound to {sock_name}")
+            if self.listen_socket:
+                # Socket activation: already bound and listening, just adopt it
+                self.server = ThreadedHTTPServer(
+                    ('0.0.0.0', self.camera.port), handler, bind_and_activate=False
+                )
+                self.server.socket.close()
+                self.server.socket = self.listen_socket
+                self.server.server_address = self.listen_socket.getsockname()
+                self.logger.info(f"Using inherited socket {self.server.server_address}")
+            else:
+                self.server = ThreadedHTTPServer(('0.0.0.0', self.camera.port), handler)
+                
+                # Verify server socket is actually bound
+                sock_name = self.server.socket.getsockname()
+                self.logger.info(f"Server socket bound to {sock_name}")
             
             self.thread = threading.Thread(
                 target=self._serve_forever_wrapper,
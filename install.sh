@@ -16,6 +16,8 @@ CURRENT_USER="${USER}"
 INSTALL_DIR="${HOME}/webcam-streamer"
 SERVICE_NAME="webcam-streamer.service"
 SERVICE_FILE="/etc/systemd/system/${SERVICE_NAME}"
+SOCKET_NAME="webcam-streamer.socket"
+SOCKET_FILE="/etc/systemd/system/${SOCKET_NAME}"
 
 # Allow override via environment variable
 if [ -n "${WEBCAM_INSTALL_DIR}" ]; then
@@ -87,16 +89,34 @@ sed -e "s|/home/pi/webcam-streamer|${INSTALL_DIR}|g" \
 sudo cp /tmp/${SERVICE_NAME} "${SERVICE_FILE}"
 sudo chmod 644 "${SERVICE_FILE}"
 
+# Generate socket unit with one ListenStream per configured camera port
+CAMERA_PORTS=$(python3 -c "import yaml; print(' '.join(str(c['port']) for c in yaml.safe_load(open('${INSTALL_DIR}/config.yaml'))['cameras']))")
+grep -v '^ListenStream=' webcam-streamer.socket | while IFS= read -r line; do
+    echo "${line}"
+    if [ "${line}" = "[Socket]" ]; then
+        for port in ${CAMERA_PORTS}; do
+            echo "ListenStream=${port}"
+        done
+    fi
+done > /tmp/${SOCKET_NAME}
+sudo cp /tmp/${SOCKET_NAME} "${SOCKET_FILE}"
+sudo chmod 644 "${SOCKET_FILE}"
+
 # Reload systemd
 echo -e "${GREEN}Reloading systemd...${NC}"
 sudo systemctl daemon-reload
 
 # Enable service
 echo -e "${GREEN}Enabling service to start at boot...${NC}"
-sudo systemctl enable ${SERVICE_NAME}
+sudo systemctl enable ${SOCKET_NAME} ${SERVICE_NAME}
 
 # Start service
+# Stop any running instance first: an old service still holding the camera
+# ports would make the socket unit fail with "address already in use", and a
+# running socket unit would keep its old ListenStream ports
 echo -e "${GREEN}Starting service...${NC}"
+sudo systemctl stop ${SERVICE_NAME} ${SOCKET_NAME} 2>/dev/null || true
+sudo systemctl start ${SOCKET_NAME}
 sudo systemctl start ${SERVICE_NAME}
 
 # Wait a moment for service to start
@@ -115,9 +135,10 @@ if sudo systemctl is-active --quiet ${SERVICE_NAME}; then
     echo "  View status:   sudo systemctl status ${SERVICE_NAME}"
     echo "  View logs:     sudo journalctl -u ${SERVICE_NAME} -f"
     echo "  Restart:       sudo systemctl restart ${SERVICE_NAME}"
-    echo "  Stop:          sudo systemctl stop ${SERVICE_NAME}"
+    echo "  Stop:          sudo systemctl stop ${SOCKET_NAME} ${SERVICE_NAME}"
+    echo "                 (stopping only the service lets the next client start it again)"
     echo "  Edit config:   nano ${INSTALL_DIR}/config.yaml"
-    echo "                 (then restart service)"
+    echo "                 (then restart service, re-run install.sh if ports changed)"
     echo ""
     echo "Access your camera streams at:"
     echo "  http://$(hostname -I | awk '{print $1}'):8081/stream (camera 1)"
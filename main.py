@@ -9,7 +9,13 @@ import signal
 import sys
 import time
 from pathlib import Path
-from camera_streamer import CameraStream, CameraServer
+from camera_streamer import (
+    CameraStream, RelayStream, CameraServer, sd_notify, sd_watchdog_interval, sd_listen_sockets
+)
+
+
+# Seconds without a frame before a camera is reported unhealthy (without a watchdog)
+FRAME_STALE_SECONDS = 10
 
 
 class WebcamStreamerApp:
@@ -20,6 +26,7 @@ class WebcamStreamerApp:
         self.cameras = []
         self.servers = []
         self.running = False
+        self.last_status = None
         self.logger = logging.getLogger("WebcamStreamer")
     
     def load_config(self):
@@ -110,18 +117,28 @@ class WebcamStreamerApp:
             successful_cameras = []
             failed_cameras = []
             
+            profiling = config.get('settings', {}).get('profiling')
+            
+            # Sockets passed by webcam-streamer.socket already accept connections
+            listen_sockets = sd_listen_sockets()
+            if listen_sockets:
+                self.logger.info(f"Inherited listening sockets for ports: {sorted(listen_sockets)}")
+            
             # Validate and create cameras
             for idx, cam_config in enumerate(config['cameras']):
                 camera_name = cam_config.get('name', f'camera_{idx}')
                 try:
                     self.validate_camera_config(cam_config)
                     
-                    # Create camera stream
-                    camera = CameraStream(cam_config)
+                    # Create camera stream, or relay another streamer's feed
+                    if RelayStream.is_relay_device(cam_config['device']):
+                        camera = RelayStream(cam_config, profiling)
+                    else:
+                        camera = CameraStream(cam_config, profiling)
                     camera.start()
                     
                     # Create HTTP server
-                    server = CameraServer(camera)
+                    server = CameraServer(camera, listen_sockets.pop(cam_config['port'], None))
                     server.start()
                     
                     # Only add to lists if both succeeded
@@ -148,6 +165,23 @@ class WebcamStreamerApp:
                     self.logger.error(f"Failed to start '{camera_name}': {e}")
                     failed_cameras.append(camera_name)
             
+            # webcam-streamer.socket keeps holding these ports even after we close
+            # our copy, so clients connecting there hang instead of being refused
+            configured_ports = {cam_config.get('port'): cam_config.get('name', f'camera_{idx}')
+                                for idx, cam_config in enumerate(config['cameras'])}
+            for port, sock in listen_sockets.items():
+                if port in configured_ports:
+                    self.logger.warning(
+                        f"Camera '{configured_ports[port]}' failed to start, port {port} stays "
+                        f"held by the socket unit and its clients will hang until a restart"
+                    )
+                else:
+                    self.logger.warning(
+                        f"Inherited socket for port {port} has no camera configured, "
+                        f"re-run install.sh to update the socket unit"
+                    )
+                sock.close()
+            
             if not self.cameras:
                 self.logger.error("No cameras started successfully")
                 if failed_cameras:
@@ -190,6 +224,7 @@ class WebcamStreamerApp:
         
         self.logger.info("Shutting down...")
         self.running = False
+        sd_notify("STOPPING=1")
         
         # Stop servers
         for server in self.servers:
@@ -210,15 +245,50 @@ class WebcamStreamerApp:
         
         self.logger.info("Shutdown complete")
     
+    def camera_status(self, stale_after):
+        """Return (status line, cameras without frames for stale_after seconds)"""
+        now = time.time()
+        stale = [camera for camera in self.cameras
+                 if now - camera.broadcaster.timestamp > stale_after]
+        status = f"Streaming {len(self.cameras) - len(stale)}/{len(self.cameras)} camera(s)"
+        if stale:
+            status += f", no frames from: {', '.join(camera.name for camera in stale)}"
+        return status, stale
+    
+    def notify_systemd(self, watchdog_interval):
+        """Report per-camera health and watchdog pings to systemd based on actual frame flow"""
+        status, stale = self.camera_status(watchdog_interval or FRAME_STALE_SECONDS)
+        if status != self.last_status:
+            sd_notify(f"STATUS={status}")
+            self.last_status = status
+        
+        # A single stuck camera must not restart the healthy ones, so keep
+        # pinging while any camera delivers frames and let systemd restart
+        # the service only when all of them have stopped. A relay waiting for
+        # its upstream reconnects by itself, so a restart would only drop viewers.
+        waiting_relays = [camera for camera in stale
+                          if isinstance(camera, RelayStream) and camera.capture_thread
+                          and camera.capture_thread.is_alive()]
+        if watchdog_interval and len(stale) - len(waiting_relays) < len(self.cameras):
+            sd_notify("WATCHDOG=1")
+    
     def run(self):
         """Run the application until interrupted"""
         if not self.start():
             sys.exit(1)
         
+        # Ports are served from here on, cameras still warming up show in STATUS=
+        sd_notify("READY=1")
+        
+        watchdog_interval = sd_watchdog_interval()
+        # Ping at half the watchdog timeout, as recommended by sd_watchdog_enabled(3)
+        poll_interval = min(1.0, watchdog_interval / 2) if watchdog_interval else 1.0
+        
         try:
             # Keep running until interrupted
             while self.running:
-                time.sleep(1)
+                self.notify_systemd(watchdog_interval)
+                time.sleep(poll_interval)
         except KeyboardInterrupt:
             self.logger.info("Received keyboard interrupt")
         finally:
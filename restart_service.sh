@@ -6,13 +6,16 @@
 
 echo "Restarting webcam streamer..."
 
-# Stop the service
-sudo systemctl stop webcam-streamer
+# Stop the service and its socket unit (which holds the camera ports and
+# would otherwise start the service again on the next connection)
+sudo systemctl stop webcam-streamer.socket webcam-streamer 2>/dev/null || \
+    sudo systemctl stop webcam-streamer
 
 # Wait for ports to be released
 sleep 2
 
-# Start the service
+# Start the socket unit (if installed) and the service
+sudo systemctl start webcam-streamer.socket 2>/dev/null
 sudo systemctl start webcam-streamer
 
 # Wait for startup
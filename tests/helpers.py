@@ -0,0 +1,30 @@
+"""Shared fixtures for the tests: a fake camera and a frame publisher"""
+
+import threading
+import time
+import types
+
+import camera_streamer as cs
+
+
+def fake_camera(name='test', port=0, profiler=None):
+    """Return an object with the attributes StreamingHandler/CameraServer use from a camera"""
+    return types.SimpleNamespace(
+        name=name, device='/dev/null', port=port, width=2, height=2, fps=1, rotation=0,
+        running=True, broadcaster=cs.FrameBroadcaster(),
+        profiler=profiler or cs.StageProfiler()
+    )
+
+
+def start_publisher(camera, interval=0.01):
+    """Publish numbered fake frames (b'JPEG0', b'JPEG1', ...) until camera.running is cleared"""
+    def publish():
+        count = 0
+        while camera.running:
+            camera.broadcaster.publish(b'JPEG%d' % count)
+            count += 1
+            time.sleep(interval)
+    
+    thread = threading.Thread(target=publish, daemon=True)
+    thread.start()
+    return thread
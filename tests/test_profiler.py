@@ -0,0 +1,134 @@
+"""Tests for the sampled stage profiler and the /debug endpoints"""
+
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+import camera_streamer as cs
+from tests.helpers import fake_camera
+
+
+class StageProfilerTest(unittest.TestCase):
+    
+    def test_disabled_records_nothing(self):
+        profiler = cs.StageProfiler()
+        self.assertFalse(any(profiler.sample(stage) for stage in cs.StageProfiler.STAGES
+                             for _ in range(100)))
+        self.assertEqual(profiler._counters, dict.fromkeys(cs.StageProfiler.STAGES, 0))
+        self.assertTrue(all(stat['samples'] == 0 for stat in profiler.snapshot().values()))
+    
+    def test_sample_every(self):
+        profiler = cs.StageProfiler(enabled=True, sample_every=4)
+        sampled = [profiler.sample('capture') for _ in range(12)]
+        self.assertEqual(sampled, [False, False, False, True] * 3)
+    
+    def test_stages_sampled_independently(self):
+        profiler = cs.StageProfiler(enabled=True, sample_every=10)
+        counts = dict.fromkeys(cs.StageProfiler.STAGES, 0)
+        for _ in range(1000):
+            # Three clients: send runs three times per frame
+            for stage, calls in (('capture', 1), ('dispatch', 1), ('send', 3)):
+                for _ in range(calls):
+                    if profiler.sample(stage):
+                        counts[stage] += 1
+        self.assertEqual(counts, {'capture': 100, 'parse': 0, 'dispatch': 100, 'send': 300})
+    
+    def test_snapshot(self):
+        profiler = cs.StageProfiler(enabled=True)
+        for seconds in (0.001, 0.003, 0.002):
+            profiler.record('parse', seconds)
+        self.assertEqual(profiler.snapshot()['parse'],
+                         {'samples': 3, 'avg_ms': 2.0, 'max_ms': 3.0, 'last_ms': 2.0})
+        self.assertEqual(profiler.snapshot()['send'],
+                         {'samples': 0, 'avg_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0})
+        
+        profiler.reset()
+        self.assertEqual(profiler.snapshot()['parse']['samples'], 0)
+    
+    def test_sample_stacks_sees_other_threads(self):
+        done = threading.Event()
+        worker = threading.Thread(target=done.wait, name='ProfiledWorker')
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(done.set)
+        
+        report = cs.sample_stacks(0.05, interval=0.01)
+        self.assertIn('ProfiledWorker', report)
+        self.assertIn('Top functions (self):', report)
+
+
+class DebugEndpointTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.camera = fake_camera(profiler=cs.StageProfiler(enabled=True))
+        handler = type('Handler', (cs.StreamingHandler,), {'camera': self.camera})
+        self.server = cs.ThreadedHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f'http://127.0.0.1:{self.server.server_address[1]}'
+        
+        # Record requested durations instead of actually sampling
+        self.durations = []
+        patcher = mock.patch.object(
+            cs, 'sample_stacks',
+            side_effect=lambda seconds: self.durations.append(seconds) or 'REPORT\n'
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def get(self, path):
+        with urllib.request.urlopen(self.base + path, timeout=5) as response:
+            return response.status, response.read().decode()
+    
+    def assertStatus(self, path, status):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.get(path)
+        self.assertEqual(context.exception.code, status)
+    
+    def test_endpoints_hidden_when_disabled(self):
+        self.camera.profiler.enabled = False
+        self.assertStatus('/debug/stages', 404)
+        self.assertStatus('/debug/profile?seconds=1', 404)
+        self.assertEqual(self.durations, [])
+    
+    def test_stages(self):
+        self.camera.profiler.record('send', 0.004)
+        status, body = self.get('/debug/stages')
+        self.assertEqual(status, 200)
+        stages = json.loads(body)
+        self.assertEqual(stages['camera'], 'test')
+        self.assertEqual(stages['stages']['send']['avg_ms'], 4.0)
+    
+    def test_profile_report(self):
+        status, body = self.get('/debug/profile?seconds=2')
+        self.assertEqual(status, 200)
+        self.assertIn('Stage timings for test', body)
+        self.assertTrue(body.endswith('REPORT\n'))
+        self.assertEqual(self.durations, [2.0])
+    
+    def test_profile_seconds_clamped(self):
+        for query, expected in (('', 5.0), ('?seconds=0', 0.1), ('?seconds=-3', 0.1),
+                                ('?seconds=1000', cs.MAX_PROFILE_SECONDS),
+                                ('?seconds=inf', cs.MAX_PROFILE_SECONDS)):
+            self.get('/debug/profile' + query)
+            self.assertEqual(self.durations.pop(), expected, query)
+    
+    def test_profile_invalid_seconds(self):
+        self.assertStatus('/debug/profile?seconds=abc', 400)
+        self.assertStatus('/debug/profile?seconds=nan', 400)
+        self.assertEqual(self.durations, [])
+    
+    def test_concurrent_profile_rejected(self):
+        with cs._profile_lock:
+            self.assertStatus('/debug/profile?seconds=1', 409)
+        self.assertEqual(self.durations, [])
+        self.assertEqual(self.get('/debug/profile?seconds=1')[0], 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
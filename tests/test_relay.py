@@ -0,0 +1,159 @@
+"""Tests for relay mode against a local streamer instance as the upstream"""
+
+import threading
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+import camera_streamer as cs
+from tests.helpers import fake_camera, start_publisher
+
+
+class Upstream:
+    """A local streamer serving a fake camera, counting /stream connections"""
+    
+    def __init__(self, port=0):
+        self.camera = fake_camera('upstream', port)
+        self.stream_requests = 0
+        upstream = self
+        
+        class Handler(cs.StreamingHandler):
+            camera = self.camera
+            
+            def do_GET(self):
+                if self.path == '/stream':
+                    upstream.stream_requests += 1
+                super().do_GET()
+        
+        self.server = cs.ThreadedHTTPServer(('127.0.0.1', port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.publisher = start_publisher(self.camera)
+    
+    def stop(self):
+        self.camera.running = False
+        self.server.shutdown()
+        self.server.server_close()  # Waits for streaming handlers to notice
+        self.publisher.join()
+
+
+def relay_config(device, port=0):
+    return {
+        'name': 'relay', 'device': device, 'port': port,
+        'resolution': {'width': 2, 'height': 2}, 'framerate': 1,
+    }
+
+
+class RelayStreamTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.upstream = Upstream()
+        self.addCleanup(lambda: self.upstream.stop())
+    
+    def start_relay(self, device=None):
+        relay = cs.RelayStream(relay_config(
+            device or f'http://127.0.0.1:{self.upstream.port}/stream'
+        ))
+        relay.start()
+        self.addCleanup(relay.stop)
+        return relay
+    
+    def wait_for_new_frame(self, relay, timeout=10):
+        deadline = time.time() + timeout
+        sequence = relay.broadcaster.sequence
+        while time.time() < deadline:
+            result = relay.broadcaster.wait_for_frame(sequence)
+            if result:
+                return result[2]
+        self.fail("No frame relayed in time")
+    
+    def test_relays_frames_over_one_upstream_connection(self):
+        relay = self.start_relay()
+        server = cs.CameraServer(relay)
+        server.start()
+        self.addCleanup(server.stop)
+        port = server.server.server_address[1]
+        
+        clients = [urllib.request.urlopen(f'http://127.0.0.1:{port}/stream', timeout=5)
+                   for _ in range(3)]
+        for client in clients:
+            self.assertTrue(cs.read_mjpeg_part(client).startswith(b'JPEG'))
+        self.assertEqual(self.upstream.stream_requests, 1)
+        for client in clients:
+            client.close()
+    
+    def test_reconnects_after_upstream_restart(self):
+        relay = self.start_relay()
+        self.wait_for_new_frame(relay)
+        
+        port = self.upstream.port
+        self.upstream.stop()
+        self.upstream = Upstream(port)
+        
+        self.assertTrue(self.wait_for_new_frame(relay, timeout=15).startswith(b'JPEG'))
+        self.assertEqual(self.upstream.stream_requests, 1)
+    
+    def test_rejects_non_stream_upstream(self):
+        relay = cs.RelayStream(relay_config(f'http://127.0.0.1:{self.upstream.port}/'))
+        relay.running = True
+        with self.assertLogs(relay.logger, 'WARNING') as logs:
+            self.assertIsNone(relay.read_frame())
+        self.assertIn('expected an MJPEG stream', logs.output[0])
+        self.assertIsNone(relay.response)
+    
+    def test_stop_while_streaming_leaves_no_capture_thread(self):
+        relay = self.start_relay()
+        self.wait_for_new_frame(relay)
+        thread = relay.capture_thread
+        relay.stop()
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(relay.connection)
+    
+    def test_stop_during_connect_closes_socket(self):
+        relay = cs.RelayStream(relay_config(f'http://127.0.0.1:{self.upstream.port}/stream'))
+        relay.running = True
+        opened = []
+        real_connect = cs.HTTPConnection.connect
+        
+        def slow_connect(connection):
+            # stop() lands while connect() blocks, before there is a socket to interrupt
+            relay.running = False
+            real_connect(connection)
+            opened.append(connection.sock)
+        
+        with mock.patch.object(cs.HTTPConnection, 'connect', slow_connect):
+            self.assertIsNone(relay.read_frame())
+        
+        self.assertIsNone(relay.connection)
+        self.assertEqual(opened[0].fileno(), -1)
+    
+    def test_profiler_splits_upstream_wait_from_parse(self):
+        relay = cs.RelayStream(
+            relay_config(f'http://127.0.0.1:{self.upstream.port}/stream'),
+            {'enabled': True, 'sample_every': 1}
+        )
+        relay.running = True
+        self.addCleanup(relay._disconnect)
+        frames = [relay.read_frame() for _ in range(5)]
+        self.assertTrue(all(frames))
+        
+        stages = relay.profiler.snapshot()
+        self.assertEqual(stages['capture']['samples'], 5)
+        self.assertEqual(stages['parse']['samples'], 5)
+        # Upstream publishes every 10ms, that wait must not show up as parse
+        self.assertGreater(stages['capture']['avg_ms'], stages['parse']['avg_ms'])
+    
+    def test_invalid_urls_rejected_at_construction(self):
+        for device in ('http://host:abc/stream', 'http:///stream'):
+            with self.assertRaises(ValueError):
+                cs.RelayStream(relay_config(device))
+    
+    def test_is_relay_device(self):
+        self.assertTrue(cs.RelayStream.is_relay_device('http://pi.local:8081/stream'))
+        self.assertTrue(cs.RelayStream.is_relay_device('https://pi.local/stream'))
+        self.assertFalse(cs.RelayStream.is_relay_device('/dev/video0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
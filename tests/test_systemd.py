@@ -0,0 +1,184 @@
+"""Tests for systemd integration against a local fake notify socket"""
+
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+import camera_streamer as cs
+from camera_streamer import RelayStream
+from main import WebcamStreamerApp
+from tests.helpers import fake_camera
+
+
+class FakeNotifySocket:
+    """Datagram socket standing in for systemd's $NOTIFY_SOCKET"""
+    
+    def __init__(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, 'notify')
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(self.path)
+        self.sock.settimeout(0.2)
+    
+    def messages(self):
+        """Return all messages received so far"""
+        received = []
+        while True:
+            try:
+                received.append(self.sock.recv(4096).decode())
+            except socket.timeout:
+                return received
+    
+    def close(self):
+        self.sock.close()
+        self.tempdir.cleanup()
+
+
+class SdNotifyTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.notify = FakeNotifySocket()
+        self.addCleanup(self.notify.close)
+    
+    def test_sends_state(self):
+        with mock.patch.dict(os.environ, {'NOTIFY_SOCKET': self.notify.path}):
+            self.assertTrue(cs.sd_notify('READY=1'))
+        self.assertEqual(self.notify.messages(), ['READY=1'])
+    
+    def test_abstract_namespace(self):
+        name = f'webcam-streamer-test-{os.getpid()}'
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as abstract:
+            abstract.bind('\0' + name)
+            abstract.settimeout(1)
+            with mock.patch.dict(os.environ, {'NOTIFY_SOCKET': '@' + name}):
+                self.assertTrue(cs.sd_notify('WATCHDOG=1'))
+            self.assertEqual(abstract.recv(100), b'WATCHDOG=1')
+    
+    def test_not_supervised(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertFalse(cs.sd_notify('READY=1'))
+    
+    def test_missing_socket(self):
+        with mock.patch.dict(os.environ, {'NOTIFY_SOCKET': self.notify.path + '-gone'}):
+            self.assertFalse(cs.sd_notify('READY=1'))
+    
+    def test_watchdog_interval(self):
+        with mock.patch.dict(os.environ, {'WATCHDOG_USEC': '30000000'}, clear=True):
+            self.assertEqual(cs.sd_watchdog_interval(), 30.0)
+        with mock.patch.dict(os.environ, {'WATCHDOG_USEC': '30000000', 'WATCHDOG_PID': '1'}):
+            self.assertIsNone(cs.sd_watchdog_interval())
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertIsNone(cs.sd_watchdog_interval())
+
+
+class SdListenSocketsTest(unittest.TestCase):
+    
+    def setUp(self):
+        # Stand in for fd 3 with a duplicate at whatever number the OS picks
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.addCleanup(self.listener.close)
+        self.port = self.listener.getsockname()[1]
+        self.fd = os.dup(self.listener.fileno())
+    
+    def test_adopts_inherited_socket(self):
+        env = {'LISTEN_PID': str(os.getpid()), 'LISTEN_FDS': '1', 'LISTEN_FDNAMES': 'http'}
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(cs, 'SD_LISTEN_FDS_START', self.fd):
+            sockets = cs.sd_listen_sockets()
+            for var in env:
+                self.assertNotIn(var, os.environ)
+        
+        self.assertEqual(list(sockets), [self.port])
+        server = cs.CameraServer(fake_camera(port=self.port), sockets[self.port])
+        server.start()
+        self.addCleanup(server.server.server_close)
+        self.addCleanup(server.stop)
+        with urllib.request.urlopen(f'http://127.0.0.1:{self.port}/', timeout=5) as response:
+            self.assertEqual(response.status, 200)
+    
+    def test_ignores_other_pid(self):
+        self.addCleanup(os.close, self.fd)
+        env = {'LISTEN_PID': '1', 'LISTEN_FDS': '1'}
+        with mock.patch.dict(os.environ, env), \
+                mock.patch.object(cs, 'SD_LISTEN_FDS_START', self.fd):
+            self.assertEqual(cs.sd_listen_sockets(), {})
+
+
+class NotifySystemdTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.notify = FakeNotifySocket()
+        self.addCleanup(self.notify.close)
+        patcher = mock.patch.dict(os.environ, {'NOTIFY_SOCKET': self.notify.path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.app = WebcamStreamerApp('unused.yaml')
+        self.cameras = [fake_camera(name) for name in ('cam1', 'cam2')]
+        self.app.cameras = self.cameras
+    
+    def test_status_reports_each_camera(self):
+        self.app.notify_systemd(None)
+        self.assertEqual(self.notify.messages(),
+                         ['STATUS=Streaming 0/2 camera(s), no frames from: cam1, cam2'])
+        
+        self.cameras[0].broadcaster.publish(b'frame')
+        self.app.notify_systemd(None)
+        self.assertEqual(self.notify.messages(),
+                         ['STATUS=Streaming 1/2 camera(s), no frames from: cam2'])
+        
+        # Unchanged status is not resent
+        self.app.notify_systemd(None)
+        self.assertEqual(self.notify.messages(), [])
+    
+    def test_watchdog_follows_frame_flow(self):
+        self.app.notify_systemd(30)
+        self.assertNotIn('WATCHDOG=1', self.notify.messages())
+        
+        # One healthy camera keeps the service alive
+        self.cameras[0].broadcaster.publish(b'frame')
+        self.app.notify_systemd(30)
+        self.assertIn('WATCHDOG=1', self.notify.messages())
+        
+        # All cameras stalled: stop pinging so systemd restarts us
+        self.cameras[0].broadcaster.timestamp = time.time() - 60
+        self.app.notify_systemd(30)
+        self.assertNotIn('WATCHDOG=1', self.notify.messages())
+
+    def test_watchdog_kept_alive_by_reconnecting_relays(self):
+        relays = []
+        for name in ('relay1', 'relay2'):
+            relay = RelayStream({
+                'name': name, 'device': 'http://127.0.0.1:9/stream', 'port': 0,
+                'resolution': {'width': 2, 'height': 2}, 'framerate': 1,
+            })
+            # Stand in for a capture thread retrying an upstream that is down
+            done = threading.Event()
+            relay.capture_thread = threading.Thread(target=done.wait, daemon=True)
+            relay.capture_thread.start()
+            self.addCleanup(done.set)
+            relays.append((relay, done))
+        self.app.cameras = [relay for relay, _ in relays]
+        
+        self.app.notify_systemd(30)
+        messages = self.notify.messages()
+        self.assertIn('STATUS=Streaming 0/2 camera(s), no frames from: relay1, relay2', messages)
+        self.assertIn('WATCHDOG=1', messages)
+        
+        # Capture threads gone: nothing left to recover, let systemd restart us
+        for relay, done in relays:
+            done.set()
+            relay.capture_thread.join()
+        self.app.notify_systemd(30)
+        self.assertNotIn('WATCHDOG=1', self.notify.messages())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Tests for the /ws endpoint: handshake, ack pacing and frame validation"""
+
+import base64
+import hashlib
+import os
+import socket
+import struct
+import threading
+import time
+import types
+import unittest
+
+import camera_streamer as cs
+from tests.helpers import fake_camera, start_publisher
+
+HANDSHAKE = (
+    b'GET /ws HTTP/1.1\r\n'
+    b'Host: localhost\r\n'
+    b'Upgrade: websocket\r\n'
+    b'Connection: Upgrade\r\n'
+    b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n'
+    b'Sec-WebSocket-Version: 13\r\n'
+    b'\r\n'
+)
+
+
+def client_frame(opcode, payload, masked=True):
+    """Build a client-to-server WebSocket frame"""
+    header = bytes([0x80 | opcode])
+    if not masked:
+        return header + bytes([len(payload)]) + payload
+    mask = os.urandom(4)
+    return header + bytes([0x80 | len(payload)]) + mask + bytes(
+        b ^ mask[i % 4] for i, b in enumerate(payload)
+    )
+
+
+class WebSocketTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.camera = fake_camera()
+        handler = type('Handler', (cs.StreamingHandler,), {'camera': self.camera})
+        self.server = cs.ThreadedHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        
+        # Publish frames much faster than the test acks them
+        self.publisher = start_publisher(self.camera, interval=0.005)
+        self.sockets = []
+    
+    def tearDown(self):
+        self.camera.running = False
+        for sock in self.sockets:
+            sock.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.publisher.join()
+    
+    def connect(self, extra=b''):
+        """Open a WebSocket, returns (socket, reader, response headers)"""
+        sock = socket.create_connection(self.server.server_address, timeout=5)
+        self.sockets.append(sock)
+        sock.sendall(HANDSHAKE + extra)
+        reader = sock.makefile('rb')
+        lines = []
+        while True:
+            line = reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            lines.append(line)
+        return sock, reader, lines
+    
+    def read_frame(self, reader):
+        """Read one server frame, returns (opcode, payload)"""
+        header = reader.read(2)
+        length = header[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', reader.read(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', reader.read(8))[0]
+        return header[0] & 0x0F, reader.read(length)
+    
+    def test_handshake(self):
+        _, _, lines = self.connect()
+        expected = base64.b64encode(
+            hashlib.sha1(b'dGhlIHNhbXBsZSBub25jZQ==' + cs.WS_MAGIC_GUID).digest()
+        )
+        self.assertEqual(lines[0], b'HTTP/1.1 101 Switching Protocols\r\n')
+        self.assertIn(b'Sec-WebSocket-Accept: ' + expected + b'\r\n', lines)
+    
+    def test_next_frame_only_after_ack_and_newest(self):
+        sock, reader, _ = self.connect()
+        opcode, payload = self.read_frame(reader)
+        self.assertEqual(opcode, cs.WS_OP_BINARY)
+        first_sequence, timestamp = cs.WS_FRAME_HEADER.unpack_from(payload)
+        self.assertAlmostEqual(timestamp, time.time(), delta=5)
+        
+        # No ack yet: nothing else may arrive even though frames keep coming
+        sock.settimeout(0.3)
+        with self.assertRaises(socket.timeout):
+            sock.recv(1, socket.MSG_PEEK)
+        sock.settimeout(5)
+        
+        sock.sendall(client_frame(cs.WS_OP_TEXT, b'ack'))
+        _, payload = self.read_frame(reader)
+        second_sequence, _ = cs.WS_FRAME_HEADER.unpack_from(payload)
+        # Frames published while waiting were skipped, not queued
+        self.assertGreater(second_sequence, first_sequence + 1)
+        self.assertEqual(payload[cs.WS_FRAME_HEADER.size:], b'JPEG%d' % (second_sequence - 1))
+    
+    def test_ack_buffered_with_handshake(self):
+        # The ack arrives in the same packet as the request, so it sits in rfile
+        _, reader, _ = self.connect(client_frame(cs.WS_OP_TEXT, b'ack'))
+        self.assertEqual(self.read_frame(reader)[0], cs.WS_OP_BINARY)
+        self.assertEqual(self.read_frame(reader)[0], cs.WS_OP_BINARY)
+    
+    def test_ping_answered_with_pong(self):
+        sock, reader, _ = self.connect()
+        self.read_frame(reader)
+        sock.sendall(client_frame(cs.WS_OP_PING, b'hi'))
+        self.assertEqual(self.read_frame(reader), (cs.WS_OP_PONG, b'hi'))
+    
+    def test_unmasked_frame_closes_with_protocol_error(self):
+        sock, reader, _ = self.connect()
+        self.read_frame(reader)
+        sock.sendall(client_frame(cs.WS_OP_TEXT, b'ack', masked=False))
+        opcode, payload = self.read_frame(reader)
+        self.assertEqual(opcode, cs.WS_OP_CLOSE)
+        self.assertEqual(struct.unpack('!H', payload)[0], cs.WS_CLOSE_PROTOCOL_ERROR)
+    
+    def test_oversized_frame_closes_with_too_big(self):
+        sock, reader, _ = self.connect()
+        self.read_frame(reader)
+        sock.sendall(bytes([0x82, 0x80 | 127]) + struct.pack('!Q', 1 << 40) + b'\0\0\0\0')
+        opcode, payload = self.read_frame(reader)
+        self.assertEqual(opcode, cs.WS_OP_CLOSE)
+        self.assertEqual(struct.unpack('!H', payload)[0], cs.WS_CLOSE_TOO_BIG)
+    
+    def test_close_is_echoed(self):
+        sock, reader, _ = self.connect()
+        self.read_frame(reader)
+        sock.sendall(client_frame(cs.WS_OP_CLOSE, struct.pack('!H', 1000)))
+        self.assertEqual(self.read_frame(reader), (cs.WS_OP_CLOSE, struct.pack('!H', 1000)))
+
+
+class WebSocketSendTest(unittest.TestCase):
+    
+    def test_frame_written_without_copying_jpeg(self):
+        writes = []
+        handler = types.SimpleNamespace(wfile=types.SimpleNamespace(write=writes.append))
+        jpeg = b'\xff\xd8' + b'x' * 70000
+        header = cs.WS_FRAME_HEADER.pack(7, 1.5)
+        
+        cs.StreamingHandler._ws_send(handler, cs.WS_OP_BINARY, header, jpeg)
+        
+        self.assertEqual(len(writes), 2)
+        self.assertIs(writes[1], jpeg)
+        self.assertEqual(writes[0], struct.pack('!BBQ', 0x82, 127, len(header) + len(jpeg)) + header)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,8 @@ NC='\033[0m'
 INSTALL_DIR="${HOME}/webcam-streamer"
 SERVICE_NAME="webcam-streamer.service"
 SERVICE_FILE="/etc/systemd/system/${SERVICE_NAME}"
+SOCKET_NAME="webcam-streamer.socket"
+SOCKET_FILE="/etc/systemd/system/${SOCKET_NAME}"
 
 # Allow override via environment variable
 if [ -n "${WEBCAM_INSTALL_DIR}" ]; then
@@ -44,17 +46,24 @@ if sudo systemctl is-active --quiet ${SERVICE_NAME}; then
     echo -e "${GREEN}Stopping service...${NC}"
     sudo systemctl stop ${SERVICE_NAME}
 fi
+if sudo systemctl is-active --quiet ${SOCKET_NAME}; then
+    sudo systemctl stop ${SOCKET_NAME}
+fi
 
 # Disable service
 if sudo systemctl is-enabled --quiet ${SERVICE_NAME} 2>/dev/null; then
     echo -e "${GREEN}Disabling service...${NC}"
     sudo systemctl disable ${SERVICE_NAME}
 fi
+if sudo systemctl is-enabled --quiet ${SOCKET_NAME} 2>/dev/null; then
+    sudo systemctl disable ${SOCKET_NAME}
+fi
 
 # Remove service file
 if [ -f "${SERVICE_FILE}" ]; then
     echo -e "${GREEN}Removing service file...${NC}"
     sudo rm "${SERVICE_FILE}"
+    sudo rm -f "${SOCKET_FILE}"
     sudo systemctl daemon-reload
 fi
 